@@ -1,25 +1,41 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import io
 import logging
 import os
 import signal
 import time
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Literal, Sequence
 
+import numpy as np
+import orjson
+import torch
 from fastapi import Depends, FastAPI, File, Form, HTTPException, Request, UploadFile
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, ConfigDict, Field
 
-from vibevoice_docker.audio_formats import AudioFormat, audio_to_wav_bytes, wav_bytes_to_mp3_bytes
-from vibevoice_docker.model_manager import ModelId, ModelManager
+from vibevoice_docker.audio_formats import (
+    AudioFormat,
+    audio_to_mp3_bytes,
+    audio_to_pcm16,
+    audio_to_wav_bytes,
+    decode_audio_file_to_pcm16,
+    pcm16_stream_to_mp3,
+    pcm16_to_float32,
+    pcm16_to_wav_bytes,
+    wav_stream_header,
+)
+from vibevoice_docker.batching import SpeechBatcher, SpeechJob
+from vibevoice_docker.cache import LRUCache
+from vibevoice_docker.model_manager import LoadedModel, ModelId, ModelManager
 from vibevoice_docker.settings import Settings
 from vibevoice_docker.text_normalize import looks_like_speaker_script, normalize_single_speaker_script
-from vibevoice_docker.voices import VoiceStore
+from vibevoice_docker.voices import Voice, VoiceStore
 
 
 if not logging.getLogger().handlers:
@@ -31,48 +47,65 @@ if not logging.getLogger().handlers:
 logger = logging.getLogger("vibevoice_docker")
 
 settings = Settings.load()
+if settings.enable_torch_compile:
+    # inductor 默认缓存在 /tmp，放到数据卷下才能跨容器重启保留
+    os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(settings.data_dir / "torchinductor"))
 voice_store = VoiceStore(builtin_dir=settings.builtin_voices_dir, custom_dir=settings.voices_dir)
 model_manager = ModelManager(
     models_dir=settings.models_dir,
     idle_unload_seconds=settings.idle_unload_seconds,
     max_loaded_models=settings.max_loaded_models,
+    enable_cuda_graphs=settings.enable_cuda_graphs,
+    enable_torch_compile=settings.enable_torch_compile,
+    kv_cache_int8=settings.kv_cache_int8,
+    ddpm_steps=settings.ddpm_steps,
 )
+# 参考音频解码/重采样结果缓存：key 为 (model_id, sample_path, mtime_ns)
+voice_sample_cache: LRUCache[tuple[str, str, int], Any] = LRUCache(max_entries=64)
+# 单条请求的 processor 输出（CPU 张量）缓存：key 为 (脚本摘要, 参考音频 key)，重复的 (文本, 音色) 跳过分词与音频预处理。
+# 多条合并的 batch 组合几乎不会重复（且 padding 依赖整个 batch），不缓存
+processor_output_cache: LRUCache[tuple[bytes, tuple[str, str, int]], dict[str, Any]] = LRUCache(max_entries=64)
 
-app = FastAPI(title="VibeVoice OpenAI-Compatible API", version="0.1.0")
+app = FastAPI(title="VibeVoice OpenAI-Compatible API", version="0.1.0", default_response_class=ORJSONResponse)
 
 static_dir = Path(__file__).parent / "static"
 if static_dir.exists():
     app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
 
+_HEALTH_PATHS = frozenset({"/healthz", "/ping"})
+# 只有开启空闲退出时才需要统计用户请求
+_TRACK_IDLE = settings.exit_on_idle_seconds > 0
+
+
 @app.middleware("http")
 async def _log_http_requests(request: Request, call_next):
     global _active_user_requests
     global _last_user_request_at
-    global _seen_user_request
+
+    path = request.url.path
+    # 健康检查高频且不计入空闲统计，直接放行，不计时也不记日志
+    if path in _HEALTH_PATHS:
+        return await call_next(request)
 
     started_at = time.perf_counter()
-    track_for_idle = request.url.path not in {"/healthz", "/ping"}
-    if track_for_idle:
-        _seen_user_request = True
+    if _TRACK_IDLE:
         _active_user_requests += 1
-        _last_user_request_at = time.time()
-
     try:
         response = await call_next(request)
     finally:
-        if track_for_idle:
-            _active_user_requests = max(0, _active_user_requests - 1)
-            _last_user_request_at = time.time()
+        finished_at = time.perf_counter()
+        if _TRACK_IDLE:
+            _active_user_requests -= 1
+            _last_user_request_at = finished_at
 
-    elapsed_ms = (time.perf_counter() - started_at) * 1000
-    if request.url.path.startswith("/v1/") or request.url.path in {"/healthz", "/ping"}:
-        logger.info("%s %s -> %s (%.0fms)", request.method, request.url.path, response.status_code, elapsed_ms)
+    if path.startswith("/v1/"):
+        logger.info("%s %s -> %s (%.0fms)", request.method, path, response.status_code, (finished_at - started_at) * 1000)
     return response
 
 
-def _openai_error(message: str, code: str = "bad_request", status_code: int = 400) -> JSONResponse:
-    return JSONResponse(
+def _openai_error(message: str, code: str = "bad_request", status_code: int = 400) -> ORJSONResponse:
+    return ORJSONResponse(
         status_code=status_code,
         content={
             "error": {
@@ -86,25 +119,25 @@ def _openai_error(message: str, code: str = "bad_request", status_code: int = 40
 
 
 @app.exception_handler(HTTPException)
-async def _http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
+async def _http_exception_handler(request: Request, exc: HTTPException) -> ORJSONResponse:
     if request.url.path.startswith("/v1/"):
         return _openai_error(str(exc.detail), code="http_error", status_code=exc.status_code)
-    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+    return ORJSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
 
 @app.exception_handler(RequestValidationError)
-async def _validation_exception_handler(request: Request, exc: RequestValidationError) -> JSONResponse:
+async def _validation_exception_handler(request: Request, exc: RequestValidationError) -> ORJSONResponse:
     if request.url.path.startswith("/v1/"):
         return _openai_error("Request validation failed", code="validation_error", status_code=422)
-    return JSONResponse(status_code=422, content={"detail": exc.errors()})
+    return ORJSONResponse(status_code=422, content={"detail": exc.errors()})
 
 
 @app.exception_handler(Exception)
-async def _unhandled_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def _unhandled_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
     logger.exception("Unhandled exception: %s %s", request.method, request.url.path)
     if request.url.path.startswith("/v1/"):
         return _openai_error("Internal server error", code="internal_error", status_code=500)
-    return JSONResponse(status_code=500, content={"detail": "Internal server error"})
+    return ORJSONResponse(status_code=500, content={"detail": "Internal server error"})
 
 
 def require_api_key(request: Request) -> None:
@@ -125,6 +158,7 @@ class SpeechRequest(BaseModel):
     voice: str = Field(..., description="Voice id from /v1/voices")
     response_format: AudioFormat = Field("wav", description="wav | mp3")
     vibevoice_cfg_scale: float = Field(3.0, description="CFG scale (advanced)")
+    stream: bool = Field(False, description="Stream audio chunks while generating (chunked transfer)")
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -150,12 +184,7 @@ def ping() -> dict[str, str]:
 
 
 def _cuda_available() -> bool:
-    try:
-        import torch
-
-        return bool(torch.cuda.is_available())
-    except Exception:
-        return False
+    return bool(torch.cuda.is_available())
 
 
 @app.get("/v1/models")
@@ -169,23 +198,35 @@ def list_models(_: None = Depends(require_api_key)) -> dict[str, Any]:
     }
 
 
+# 音色列表序列化结果：列表内容不变时直接返回缓存的字节
+_voices_response_cache: tuple[tuple[Voice, ...], bytes] | None = None
+
+
 @app.get("/v1/voices")
-def list_voices(_: None = Depends(require_api_key)) -> dict[str, Any]:
+def list_voices(_: None = Depends(require_api_key)) -> Response:
+    global _voices_response_cache
+
     voice_store.ensure_dirs()
-    voices = voice_store.list_voices()
-    return {
-        "object": "list",
-        "data": [
+    voices = tuple(voice_store.list_voices())
+    cached = _voices_response_cache
+    if cached is None or cached[0] != voices:
+        body = orjson.dumps(
             {
-                "id": v.id,
-                "object": "voice",
-                "name": v.name,
-                "type": v.type,
-                "created": v.created_at,
+                "object": "list",
+                "data": [
+                    {
+                        "id": v.id,
+                        "object": "voice",
+                        "name": v.name,
+                        "type": v.type,
+                        "created": v.created_at,
+                    }
+                    for v in voices
+                ],
             }
-            for v in voices
-        ],
-    }
+        )
+        cached = _voices_response_cache = (voices, body)
+    return Response(cached[1], media_type="application/json")
 
 
 @app.post("/v1/voices")
@@ -199,22 +240,20 @@ async def create_voice(
     if not name.strip():
         raise HTTPException(status_code=400, detail="name is required")
 
-    upload_dir = settings.data_dir / "uploads"
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    safe_filename = Path(file.filename or "voice").name
-    tmp_path = upload_dir / f"upload-{int(time.time())}-{safe_filename}"
-    tmp_path.write_bytes(await file.read())
-
-    # 统一转换为 24kHz mono wav，便于稳定复用
-    wav_path = upload_dir / f"converted-{tmp_path.stem}.wav"
-    _ffmpeg_to_wav_24k_mono(tmp_path, wav_path)
-
-    voice = voice_store.create_voice(name=name, sample_wav_path=wav_path)
+    # 直接从上传的临时文件解码为 24kHz mono（不再整体读入内存再落盘一次）
     try:
-        tmp_path.unlink(missing_ok=True)
-        wav_path.unlink(missing_ok=True)
-    except Exception:
-        pass
+        pcm = await asyncio.to_thread(decode_audio_file_to_pcm16, file.file, _SAMPLE_RATE)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"音频转换失败: {exc}")
+
+    # 同时保存解码后的 float32 波形，推理时直接 np.load，不再经过 librosa 解码
+    feat = io.BytesIO()
+    np.save(feat, pcm16_to_float32(pcm))
+    voice = voice_store.create_voice(
+        name=name,
+        sample_wav_bytes=pcm16_to_wav_bytes(pcm, _SAMPLE_RATE),
+        sample_feat_bytes=feat.getvalue(),
+    )
     return {
         "id": voice.id,
         "object": "voice",
@@ -224,35 +263,6 @@ async def create_voice(
     }
 
 
-def _ffmpeg_to_wav_24k_mono(src: Path, dst: Path) -> None:
-    import subprocess
-
-    proc = subprocess.run(
-        [
-            "ffmpeg",
-            "-hide_banner",
-            "-loglevel",
-            "error",
-            "-y",
-            "-i",
-            str(src),
-            "-ac",
-            "1",
-            "-ar",
-            "24000",
-            str(dst),
-        ],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        check=False,
-    )
-    if proc.returncode != 0:
-        raise HTTPException(
-            status_code=400,
-            detail=f"音频转换失败: {proc.stderr.decode('utf-8', errors='ignore')}",
-        )
-
-
 @app.delete("/v1/voices/{voice_id}")
 def delete_voice(voice_id: str, _: None = Depends(require_api_key)) -> dict[str, Any]:
     voice = voice_store.get_voice(voice_id)
@@ -261,13 +271,18 @@ def delete_voice(voice_id: str, _: None = Depends(require_api_key)) -> dict[str,
     if voice.type == "builtin":
         raise HTTPException(status_code=400, detail="builtin voices cannot be deleted")
     ok = voice_store.delete_voice(voice_id)
+    sample_path = str(voice.sample_path)
+    voice_sample_cache.discard_where(lambda key: key[1] == sample_path)
+    processor_output_cache.discard_where(lambda key: key[1][1] == sample_path)
     return {"deleted": ok, "id": voice_id, "object": "voice"}
 
 
-_generation_lock = asyncio.Lock()
+_SAMPLE_RATE = 24000
+# 流式输出时按 0.5s 凑整再下发，避免过碎的小包
+_STREAM_CHUNK_SAMPLES = _SAMPLE_RATE // 2
 _active_user_requests = 0
-_last_user_request_at = time.time()
-_seen_user_request = False
+# time.perf_counter() 时钟；None 表示尚未收到过用户请求
+_last_user_request_at: float | None = None
 
 
 def _request_process_exit() -> None:
@@ -297,33 +312,48 @@ async def create_speech(payload: SpeechRequest, _: None = Depends(require_api_ke
 
     request_started_at = time.perf_counter()
     logger.info(
-        "TTS start model=%s voice=%s format=%s chars=%d",
+        "TTS start model=%s voice=%s format=%s chars=%d stream=%s",
         model_id,
         voice.id,
         payload.response_format,
         len(payload.input or ""),
+        payload.stream,
     )
 
-    lock_wait_started_at = time.perf_counter()
-    async with _generation_lock:
-        lock_wait_ms = (time.perf_counter() - lock_wait_started_at) * 1000
-        if lock_wait_ms >= 50:
-            logger.info("TTS waited for lock %.0fms", lock_wait_ms)
-
-        inference_started_at = time.perf_counter()
-        audio, sample_rate = await asyncio.to_thread(
-            _run_inference,
-            model_id,
+    if payload.stream:
+        job = await speech_batcher.submit(
             script,
             voice.sample_path,
             float(payload.vibevoice_cfg_scale),
+            stream=True,
+            voice_feat_path=voice.feat_path,
         )
-        inference_ms = (time.perf_counter() - inference_started_at) * 1000
+        try:
+            return await _stream_speech(job, model_id, voice.id, payload.response_format, request_started_at)
+        except FileNotFoundError:
+            return _openai_error(f"Unknown voice: {payload.voice}", code="voice_not_found", status_code=404)
+
+    job = await speech_batcher.submit(
+        script,
+        voice.sample_path,
+        float(payload.vibevoice_cfg_scale),
+        voice_feat_path=voice.feat_path,
+    )
+    try:
+        audio = await job.future
+    except asyncio.CancelledError:
+        job.cancel()
+        raise
+    except FileNotFoundError:
+        # 排队期间音色被删除
+        return _openai_error(f"Unknown voice: {payload.voice}", code="voice_not_found", status_code=404)
+    _log_queue_wait(job)
+    sample_rate = _SAMPLE_RATE
+    inference_ms = (time.perf_counter() - job.submitted_at) * 1000
 
     encode_started_at = time.perf_counter()
-    wav_bytes = audio_to_wav_bytes(audio, sample_rate=sample_rate)
     if payload.response_format == "mp3":
-        mp3_bytes = wav_bytes_to_mp3_bytes(wav_bytes)
+        mp3_bytes = audio_to_mp3_bytes(audio, sample_rate=sample_rate)
         total_ms = (time.perf_counter() - request_started_at) * 1000
         encode_ms = (time.perf_counter() - encode_started_at) * 1000
         logger.info(
@@ -336,8 +366,9 @@ async def create_speech(payload: SpeechRequest, _: None = Depends(require_api_ke
             inference_ms,
             encode_ms,
         )
-        return StreamingResponse(io.BytesIO(mp3_bytes), media_type="audio/mpeg")
+        return Response(content=mp3_bytes, media_type="audio/mpeg")
 
+    wav_bytes = audio_to_wav_bytes(audio, sample_rate=sample_rate)
     total_ms = (time.perf_counter() - request_started_at) * 1000
     encode_ms = (time.perf_counter() - encode_started_at) * 1000
     logger.info(
@@ -350,46 +381,265 @@ async def create_speech(payload: SpeechRequest, _: None = Depends(require_api_ke
         inference_ms,
         encode_ms,
     )
-    return StreamingResponse(io.BytesIO(wav_bytes), media_type="audio/wav")
+    return Response(content=wav_bytes, media_type="audio/wav")
+
+
+def _log_queue_wait(job: SpeechJob) -> None:
+    if job.started_at is None:
+        return
+    wait_ms = (job.started_at - job.submitted_at) * 1000
+    if wait_ms >= 50:
+        logger.info("TTS waited in queue %.0fms", wait_ms)
+
+
+async def _stream_pcm16(job: SpeechJob) -> AsyncGenerator[bytes, None]:
+    """读取 job 的音频块，转成 16-bit PCM 并按 0.5s 凑整逐块产出。"""
+    try:
+        pending: list[bytes] = []
+        pending_samples = 0
+        async for chunk in job.iter_chunks():
+            pcm = audio_to_pcm16(chunk)
+            pending.append(pcm.tobytes())
+            pending_samples += pcm.size
+            if pending_samples >= _STREAM_CHUNK_SAMPLES:
+                yield b"".join(pending)
+                pending.clear()
+                pending_samples = 0
+        _log_queue_wait(job)
+        if pending:
+            yield b"".join(pending)
+    finally:
+        # 客户端断开或出错时标记取消；同一 batch 全部取消后生成循环会提前退出
+        job.cancel()
+
+
+async def _stream_speech(
+    job: SpeechJob,
+    model_id: ModelId,
+    voice_id: str,
+    response_format: AudioFormat,
+    request_started_at: float,
+) -> StreamingResponse:
+    pcm_chunks = _stream_pcm16(job)
+    if response_format == "mp3":
+        chunks = pcm16_stream_to_mp3(pcm_chunks, sample_rate=_SAMPLE_RATE)
+        media_type = "audio/mpeg"
+    else:
+        chunks = pcm_chunks
+        media_type = "audio/wav"
+
+    # 先等到第一块音频再返回响应头：加载/推理阶段的错误仍能以正常的 HTTP 错误返回
+    try:
+        first_chunk = await anext(chunks)
+    except StopAsyncIteration:
+        raise RuntimeError("No audio generated")
+
+    async def _body() -> AsyncIterator[bytes]:
+        global _active_user_requests
+        global _last_user_request_at
 
-def _run_inference(model_id: ModelId, script: str, voice_sample_path: Path, cfg_scale: float):
+        # 中间件在响应头发出后就已返回；流式 body 发送期间仍算作活跃请求，结束时重新开始空闲计时
+        if _TRACK_IDLE:
+            _active_user_requests += 1
+        sent = 0
+        try:
+            if response_format == "wav":
+                header = wav_stream_header(_SAMPLE_RATE)
+                sent += len(header)
+                yield header
+            sent += len(first_chunk)
+            yield first_chunk
+            async for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+        except Exception:
+            logger.exception("TTS stream failed model=%s voice=%s", model_id, voice_id)
+            raise
+        finally:
+            await chunks.aclose()
+            if _TRACK_IDLE:
+                _active_user_requests -= 1
+                _last_user_request_at = time.perf_counter()
+        logger.info(
+            "TTS done model=%s voice=%s sr=%s bytes=%d total=%.0fms (stream)",
+            model_id,
+            voice_id,
+            _SAMPLE_RATE,
+            sent,
+            (time.perf_counter() - request_started_at) * 1000,
+        )
+
+    return StreamingResponse(_body(), media_type=media_type)
+
+
+def _run_inference(
+    model_id: ModelId,
+    scripts: Sequence[str],
+    voice_samples: Sequence[tuple[tuple[str, str, int], Any]],
+    cfg_scale: float,
+    audio_streamer: Any = None,
+    stop_check_fn: Callable[[], bool] | None = None,
+) -> list[Any]:
+    """一次 generate 处理一个 batch，返回与 scripts 一一对应的音频（未生成则为 None）。
+
+    voice_samples 为 _prepare_voice_sample 的结果：(缓存 key, 已读取的参考音频)。
+    """
     loaded = model_manager.get(model_id)
     processor = loaded.processor
     model = loaded.model
 
-    inputs = processor(
-        text=[script],
-        voice_samples=[[str(voice_sample_path)]],
-        padding=True,
-        return_tensors="pt",
-        return_attention_mask=True,
-    )
-
-    target_device = loaded.device
-    for k, v in list(inputs.items()):
-        try:
-            import torch
+    cache_key = None
+    cached = None
+    if len(scripts) == 1:
+        cache_key = (hashlib.blake2b(scripts[0].encode("utf-8"), digest_size=16).digest(), voice_samples[0][0])
+        cached = processor_output_cache.get(cache_key)
+    if cached is None:
+        inputs = processor(
+            text=list(scripts),
+            voice_samples=[[wav] for _, wav in voice_samples],
+            padding=True,
+            return_tensors="pt",
+            return_attention_mask=True,
+        )
+        cached = dict(inputs)
+        if cache_key is not None:
+            processor_output_cache.put(cache_key, cached)
+    # 浅拷贝：搬运到设备时替换的是字典中的值，缓存里的 CPU 张量保持不变
+    inputs = dict(cached)
 
-            if torch.is_tensor(v):
-                inputs[k] = v.to(target_device)
-        except Exception:
-            pass
+    _move_inputs_to_device(inputs, loaded)
 
     outputs = model.generate(
         **inputs,
         max_new_tokens=None,
         cfg_scale=cfg_scale,
         tokenizer=processor.tokenizer,
-        generation_config={"do_sample": False},
+        generation_config=loaded.generation_config,
+        audio_streamer=audio_streamer,
+        stop_check_fn=stop_check_fn,
         show_progress_bar=False,
         refresh_negative=True,
         verbose=False,
         is_prefill=True,
     )
 
-    if not outputs.speech_outputs or outputs.speech_outputs[0] is None:
-        raise RuntimeError("No audio generated")
-    return outputs.speech_outputs[0], 24000
+    speech_outputs = list(outputs.speech_outputs or [])
+    return speech_outputs + [None] * (len(scripts) - len(speech_outputs))
+
+
+def _move_inputs_to_device(inputs: Any, loaded: LoadedModel) -> None:
+    """把 processor 输出的张量搬到目标设备；CUDA 上经复用的 pinned 缓冲区在模型专用 stream 上异步拷贝。"""
+    tensor_keys = [k for k, v in inputs.items() if torch.is_tensor(v)]
+    stream = loaded.h2d_stream
+    if stream is None:
+        for k in tensor_keys:
+            inputs[k] = inputs[k].to(loaded.device)
+        return
+
+    # 上一次的异步拷贝可能仍在读取暂存区，先等它完成再覆盖
+    stream.synchronize()
+    compute_stream = torch.cuda.current_stream()
+    with torch.cuda.stream(stream):
+        for k in tensor_keys:
+            staged = _staging_view(loaded.staging, k, inputs[k])
+            staged.copy_(inputs[k])
+            inputs[k] = staged.to(loaded.device, non_blocking=True)
+    compute_stream.wait_stream(stream)
+    # 张量在拷贝 stream 上分配，标记给计算 stream 使用，避免被缓存分配器提前复用
+    for k in tensor_keys:
+        inputs[k].record_stream(compute_stream)
+
+
+def _staging_view(staging: dict[str, torch.Tensor], key: str, src: torch.Tensor) -> torch.Tensor:
+    buf = staging.get(key)
+    numel = src.numel()
+    if buf is None or buf.dtype != src.dtype or buf.numel() < numel:
+        buf = torch.empty(numel, dtype=src.dtype, pin_memory=True)
+        staging[key] = buf
+    return buf[:numel].view(src.shape)
+
+
+def _run_speech_jobs(
+    jobs: Sequence[SpeechJob],
+    audio_streamer: Any,
+    stop_check_fn: Callable[[], bool],
+) -> list[Any]:
+    return _run_inference(
+        settings.model_id,
+        [job.script for job in jobs],
+        [job.prepared for job in jobs],
+        jobs[0].cfg_scale,
+        audio_streamer=audio_streamer,
+        stop_check_fn=stop_check_fn,
+    )
+
+
+def _prepare_speech_job(job: SpeechJob) -> tuple[tuple[str, str, int], Any]:
+    # 排队期间音色可能已被删除：在组 batch 前逐个读取，只让对应请求失败
+    return _prepare_voice_sample(settings.model_id, job.voice_sample_path, job.voice_feat_path)
+
+
+speech_batcher = SpeechBatcher(
+    _run_speech_jobs,
+    prepare_job=_prepare_speech_job,
+    max_batch_size=settings.max_batch_size,
+    batch_window_seconds=settings.batch_window_ms / 1000,
+)
+
+
+def _voice_sample_key(loaded: LoadedModel, voice_sample_path: Path) -> tuple[str, str, int]:
+    return (loaded.model_id, str(voice_sample_path), voice_sample_path.stat().st_mtime_ns)
+
+
+def _prepare_voice_sample(
+    model_id: ModelId, voice_sample_path: Path, voice_feat_path: Path | None = None
+) -> tuple[tuple[str, str, int], Any]:
+    """返回 (缓存 key, 参考音频)；文件已不存在时抛出 FileNotFoundError。"""
+    loaded = model_manager.get(model_id)
+    key = _voice_sample_key(loaded, voice_sample_path)
+    return key, _load_voice_sample(loaded, key, voice_feat_path)
+
+
+def _load_voice_sample(loaded: LoadedModel, key: tuple[str, str, int], voice_feat_path: Path | None = None) -> Any:
+    """读取参考音频（解码 + 重采样到模型采样率），结果按文件 mtime 缓存，重复音色不再读盘。"""
+    wav = voice_sample_cache.get(key)
+    if wav is None:
+        audio_processor = loaded.processor.audio_processor
+        if voice_feat_path is not None and voice_feat_path.exists() and audio_processor.sampling_rate == _SAMPLE_RATE:
+            # 创建音色时已保存 24kHz float32 波形
+            wav = np.load(voice_feat_path)
+        else:
+            wav = audio_processor._load_audio_from_path(key[1])
+        voice_sample_cache.put(key, wav)
+    return wav
+
+
+_WARMUP_SCRIPT = "Speaker 0: Hello."
+
+
+async def _warmup(model_id: ModelId, voice: Voice) -> None:
+    started_at = time.perf_counter()
+    # CUDA graph / 编译后的预测头按输入形状（[2 * batch, ...]）特化，与脚本长度无关；
+    # 语言模型以 dynamic=True 编译，序列长度也不会触发重新编译。因此按 batch 大小逐一预热
+    if settings.enable_torch_compile or settings.enable_cuda_graphs:
+        batch_sizes = range(1, settings.max_batch_size + 1)
+    else:
+        batch_sizes = range(1, 2)
+    voice_sample = await asyncio.to_thread(_prepare_voice_sample, model_id, voice.sample_path, voice.feat_path)
+    for batch_size in batch_sizes:
+        await asyncio.to_thread(
+            _run_inference,
+            model_id,
+            [_WARMUP_SCRIPT] * batch_size,
+            [voice_sample] * batch_size,
+            3.0,
+        )
+    logger.info(
+        "Warmup done model=%s batch_sizes=1..%d in %.1fs",
+        model_id,
+        batch_sizes[-1],
+        time.perf_counter() - started_at,
+    )
 
 
 @app.on_event("startup")
@@ -405,20 +655,22 @@ async def _startup() -> None:
             if now - last_unload_checked_at >= 30:
                 last_unload_checked_at = now
                 try:
-                    model_manager.maybe_unload_idle()
+                    # 卸载时的 gc 与显存释放持有 GIL / 同步设备，放到线程里，不阻塞事件循环接收请求
+                    await asyncio.to_thread(model_manager.maybe_unload_idle)
                 except Exception:
                     pass
 
-            if settings.exit_on_idle_seconds <= 0:
+            if not _TRACK_IDLE or _last_user_request_at is None:
                 continue
 
-            if not _seen_user_request:
+            if _active_user_requests > 0:
                 continue
 
-            if _active_user_requests > 0:
+            # 队列中或生成中的请求都不算空闲（流式 body 另由 _active_user_requests 计数）
+            if speech_batcher.busy:
                 continue
 
-            idle_seconds = now - _last_user_request_at
+            idle_seconds = time.perf_counter() - _last_user_request_at
             if idle_seconds < settings.exit_on_idle_seconds:
                 continue
 
@@ -433,15 +685,10 @@ async def _startup() -> None:
             if settings.warmup_on_preload:
                 voices = voice_store.list_voices()
                 if voices:
-                    await asyncio.to_thread(
-                        _run_inference,
-                        model_id,
-                        "Speaker 0: Hello.",
-                        voices[0].sample_path,
-                        3.0,
-                    )
+                    await _warmup(model_id, voices[0])
         except Exception:
             # 预热失败不影响服务启动
-            pass
+            logger.exception("Warmup failed")
 
+    speech_batcher.start()
     asyncio.create_task(_maintenance_loop())
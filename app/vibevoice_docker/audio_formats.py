@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-import io
-import subprocess
-from typing import Literal
+import struct
+from pathlib import Path
+from typing import AsyncGenerator, BinaryIO, Literal
 
 import numpy as np
 
 
 AudioFormat = Literal["wav", "mp3"]
 
+# 流式 WAV 事先不知道总长度：RIFF/data 大小写成 0xFFFFFFFF，播放器会读到连接关闭为止
+_WAV_STREAM_SIZE = 0xFFFFFFFF
+_PCM16_DTYPE = np.dtype("<i2")
 
-def audio_to_wav_bytes(audio: "np.ndarray | object", sample_rate: int) -> bytes:
+
+def _audio_to_float32(audio: "np.ndarray | object") -> np.ndarray:
     try:
         import torch
     except Exception:  # pragma: no cover
@@ -21,40 +25,125 @@ def audio_to_wav_bytes(audio: "np.ndarray | object", sample_rate: int) -> bytes:
     else:
         audio_np = np.asarray(audio, dtype=np.float32)
 
-    audio_np = np.squeeze(audio_np)
-    audio_np = np.clip(audio_np, -1.0, 1.0)
+    return np.squeeze(audio_np)
+
+
+def audio_to_pcm16(audio: "np.ndarray | object") -> np.ndarray:
+    audio_np = _audio_to_float32(audio)
+    # clip 输出新数组，缩放原地完成再一次性转 int16，不改写调用方的缓冲区
+    pcm = np.clip(audio_np, -1.0, 1.0)
+    np.multiply(pcm, 32767.0, out=pcm)
+    return pcm.astype(_PCM16_DTYPE, copy=False)
+
+
+def pcm16_to_float32(pcm: np.ndarray) -> np.ndarray:
+    """int16 PCM -> [-1, 1) float32，与 librosa/soundfile 读取 16-bit wav 的结果一致。"""
+    audio = pcm.astype(np.float32)
+    np.multiply(audio, 1.0 / 32768.0, out=audio)
+    return audio
+
+
+def _wav_header(sample_rate: int, data_size: int | None, channels: int = 1) -> bytes:
+    block_align = channels * 2
+    if data_size is None:
+        riff_size = data_size = _WAV_STREAM_SIZE
+    else:
+        riff_size = 36 + data_size
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        riff_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        16,
+        b"data",
+        data_size,
+    )
+
+
+def wav_stream_header(sample_rate: int, channels: int = 1) -> bytes:
+    """生成 16-bit PCM WAV 头（长度未知，用于分块流式输出）。"""
+    return _wav_header(sample_rate, None, channels)
+
+
+def pcm16_to_wav_bytes(pcm: np.ndarray, sample_rate: int) -> bytes:
+    return _wav_header(sample_rate, pcm.nbytes) + pcm.tobytes()
+
+
+def audio_to_wav_bytes(audio: "np.ndarray | object", sample_rate: int) -> bytes:
+    return pcm16_to_wav_bytes(audio_to_pcm16(audio), sample_rate)
+
 
+def decode_audio_file_to_pcm16(src: "str | Path | BinaryIO", sample_rate: int) -> np.ndarray:
+    """
+    在进程内（PyAV/libav）解码任意音频文件，并重采样为单声道 16-bit PCM。
+
+    - 解码失败或没有音频流时抛出 ValueError
+    """
     try:
-        import soundfile as sf
+        import av
     except ImportError as exc:  # pragma: no cover
-        raise RuntimeError("缺少依赖：soundfile（用于写出 WAV）") from exc
-
-    buf = io.BytesIO()
-    sf.write(buf, audio_np, sample_rate, format="WAV", subtype="PCM_16")
-    return buf.getvalue()
-
-
-def wav_bytes_to_mp3_bytes(wav_bytes: bytes, bitrate: str = "192k") -> bytes:
-    proc = subprocess.run(
-        [
-            "ffmpeg",
-            "-hide_banner",
-            "-loglevel",
-            "error",
-            "-i",
-            "pipe:0",
-            "-f",
-            "mp3",
-            "-b:a",
-            bitrate,
-            "pipe:1",
-        ],
-        input=wav_bytes,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        check=False,
-    )
-    if proc.returncode != 0:
-        raise RuntimeError(f"ffmpeg 转码失败: {proc.stderr.decode('utf-8', errors='ignore')}")
-    return proc.stdout
+        raise RuntimeError("缺少依赖：av（用于解码上传的音频）") from exc
+
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+    chunks: list[np.ndarray] = []
+    try:
+        with av.open(str(src) if isinstance(src, Path) else src) as container:
+            if not container.streams.audio:
+                raise ValueError("no audio stream found")
+            for frame in container.decode(container.streams.audio[0]):
+                for out in resampler.resample(frame):
+                    chunks.append(out.to_ndarray().reshape(-1))
+            for out in resampler.resample(None):
+                chunks.append(out.to_ndarray().reshape(-1))
+    except av.error.FFmpegError as exc:
+        raise ValueError(str(exc)) from exc
+
+    if not chunks:
+        raise ValueError("no audio decoded")
+    return np.concatenate(chunks).astype(_PCM16_DTYPE, copy=False)
+
 
+def _new_mp3_encoder(sample_rate: int, bitrate: int):
+    try:
+        import lameenc
+    except ImportError as exc:  # pragma: no cover
+        raise RuntimeError("缺少依赖：lameenc（用于编码 MP3）") from exc
+
+    encoder = lameenc.Encoder()
+    encoder.set_bit_rate(bitrate)
+    encoder.set_in_sample_rate(sample_rate)
+    encoder.set_channels(1)
+    encoder.set_quality(2)
+    return encoder
+
+
+def audio_to_mp3_bytes(audio: "np.ndarray | object", sample_rate: int, bitrate: int = 192) -> bytes:
+    encoder = _new_mp3_encoder(sample_rate, bitrate)
+    pcm = audio_to_pcm16(audio)
+    return bytes(encoder.encode(pcm.tobytes()) + encoder.flush())
+
+
+async def pcm16_stream_to_mp3(
+    pcm_chunks: AsyncGenerator[bytes, None],
+    sample_rate: int,
+    bitrate: int = 192,
+) -> AsyncGenerator[bytes, None]:
+    """边生成边编码：逐块把 s16le PCM 送入 LAME 编码器并产出 MP3 数据。"""
+    encoder = _new_mp3_encoder(sample_rate, bitrate)
+    try:
+        async for chunk in pcm_chunks:
+            data = encoder.encode(chunk)
+            if data:
+                yield bytes(data)
+        tail = encoder.flush()
+        if tail:
+            yield bytes(tail)
+    finally:
+        await pcm_chunks.aclose()
@@ -0,0 +1,219 @@
+"""
+TTS 请求排队与微批处理。
+
+所有生成请求进入有界队列，由单个后台 worker 依次取出；在合并窗口内到达、且 cfg_scale 相同的请求
+合并成一个 batch，一次 processor + model.generate 完成，再把结果分发回各请求。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Sequence
+
+
+logger = logging.getLogger("vibevoice_docker.batching")
+
+_STREAM_END = object()
+
+# run_batch(jobs, audio_streamer, stop_check_fn) -> 每个 job 对应的完整音频（或 None）
+RunBatchFn = Callable[[Sequence["SpeechJob"], Any, Callable[[], bool]], Sequence[Any]]
+# prepare_job(job) -> 存入 job.prepared 的结果；抛错只让该 job 失败
+PrepareJobFn = Callable[["SpeechJob"], Any]
+
+
+@dataclass(eq=False)
+class SpeechJob:
+    script: str
+    voice_sample_path: Path
+    cfg_scale: float
+    future: asyncio.Future
+    voice_feat_path: Path | None = None
+    chunks: asyncio.Queue | None = None
+    # prepare_job 的返回值（如已读取的参考音频），在推理线程中写入
+    prepared: Any = None
+    submitted_at: float = field(default_factory=time.perf_counter)
+    started_at: float | None = None
+    cancelled: bool = False
+    # 由推理线程写入：generate 已对该样本调用 end()
+    stream_ended: bool = False
+    _end_sent: bool = False
+
+    def cancel(self) -> None:
+        """客户端断开时调用；同一 batch 的请求全部取消后生成循环会提前退出。"""
+        self.cancelled = True
+        if not self.future.done():
+            self.future.cancel()
+
+    async def iter_chunks(self) -> AsyncIterator[Any]:
+        if self.chunks is None:
+            raise RuntimeError("job was not submitted with stream=True")
+        while True:
+            item = await self.chunks.get()
+            if item is _STREAM_END:
+                break
+            yield item
+        await self.future
+
+    def _finish(self, audio: Any) -> None:
+        if self.chunks is not None and not self._end_sent:
+            self._end_sent = True
+            self.chunks.put_nowait(_STREAM_END)
+        if not self.future.done():
+            self.future.set_result(audio)
+
+    def _fail(self, exc: BaseException) -> None:
+        if not self.future.done():
+            self.future.set_exception(exc)
+        if self.chunks is not None and not self._end_sent:
+            self._end_sent = True
+            self.chunks.put_nowait(_STREAM_END)
+
+
+class _BatchAudioStreamer:
+    """
+    传给 model.generate 的 audio_streamer：按样本下标把音频块分发到对应 job 的队列。
+
+    注意：不能提供 finished_flags 属性——generate 只要看到任一样本结束就会停止整个 batch。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, jobs: Sequence[SpeechJob]):
+        self._loop = loop
+        self._jobs = jobs
+
+    def put(self, audio_chunks: Any, sample_indices: Any) -> None:
+        for i, sample_idx in enumerate(sample_indices):
+            job = self._jobs[int(sample_idx)]
+            if job.chunks is None or job.stream_ended or job.cancelled:
+                continue
+            chunk = audio_chunks[i].detach().cpu()
+            self._loop.call_soon_threadsafe(job.chunks.put_nowait, chunk)
+
+    def end(self, sample_indices: Any = None) -> None:
+        indices = range(len(self._jobs)) if sample_indices is None else [int(i) for i in sample_indices]
+        for idx in indices:
+            job = self._jobs[idx]
+            if job.chunks is None or job.stream_ended:
+                continue
+            job.stream_ended = True
+            self._loop.call_soon_threadsafe(job._finish, None)
+
+
+class SpeechBatcher:
+    def __init__(
+        self,
+        run_batch: RunBatchFn,
+        prepare_job: PrepareJobFn | None = None,
+        max_batch_size: int = 1,
+        batch_window_seconds: float = 0.005,
+        max_queued_jobs: int = 64,
+    ):
+        self._run_batch = run_batch
+        self._prepare_job = prepare_job
+        self._max_batch_size = max(1, int(max_batch_size))
+        self._batch_window_seconds = max(0.0, float(batch_window_seconds))
+        self._queue: asyncio.Queue[SpeechJob] = asyncio.Queue(maxsize=max(1, int(max_queued_jobs)))
+        self._running = False
+        self._worker_task: asyncio.Task | None = None
+
+    @property
+    def busy(self) -> bool:
+        return self._running or not self._queue.empty()
+
+    def start(self) -> None:
+        if self._worker_task is None:
+            self._worker_task = asyncio.create_task(self._worker())
+
+    async def submit(
+        self,
+        script: str,
+        voice_sample_path: Path,
+        cfg_scale: float,
+        stream: bool = False,
+        voice_feat_path: Path | None = None,
+    ) -> SpeechJob:
+        """入队（队列满时等待，形成背压），返回可等待结果/读取音频块的 job。"""
+        loop = asyncio.get_running_loop()
+        job = SpeechJob(
+            script=script,
+            voice_sample_path=voice_sample_path,
+            cfg_scale=cfg_scale,
+            future=loop.create_future(),
+            voice_feat_path=voice_feat_path,
+            chunks=asyncio.Queue() if stream else None,
+        )
+        await self._queue.put(job)
+        return job
+
+    async def _next_batch(self) -> list[SpeechJob]:
+        batch = [await self._queue.get()]
+        if self._max_batch_size > 1 and self._batch_window_seconds > 0 and self._queue.empty():
+            await asyncio.sleep(self._batch_window_seconds)
+        while len(batch) < self._max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            # cfg_scale 是整个 generate 调用共享的参数，按它分组
+            groups: dict[float, list[SpeechJob]] = {}
+            for job in batch:
+                groups.setdefault(job.cfg_scale, []).append(job)
+            for jobs in groups.values():
+                try:
+                    await self._run(jobs)
+                except Exception:
+                    logger.exception("Speech batch failed unexpectedly")
+
+    async def _run(self, jobs: list[SpeechJob]) -> None:
+        jobs = [job for job in jobs if not job.cancelled]
+        if not jobs:
+            return
+
+        loop = asyncio.get_running_loop()
+        started_at = time.perf_counter()
+        for job in jobs:
+            job.started_at = started_at
+        if len(jobs) > 1:
+            logger.info("TTS batch size=%d cfg=%.2f", len(jobs), jobs[0].cfg_scale)
+
+        self._running = True
+        try:
+            jobs, outputs = await asyncio.to_thread(self._prepare_and_run, loop, jobs)
+        except Exception as exc:
+            for job in jobs:
+                job._fail(exc)
+            return
+        finally:
+            self._running = False
+
+        for job, audio in zip(jobs, outputs):
+            if audio is None and not job.future.done():
+                job._fail(RuntimeError("No audio generated"))
+            else:
+                job._finish(None if job.chunks is not None else audio)
+
+    def _prepare_and_run(
+        self, loop: asyncio.AbstractEventLoop, jobs: list[SpeechJob]
+    ) -> tuple[list[SpeechJob], Sequence[Any]]:
+        """在推理线程中执行：准备失败的 job 单独出错（如音色已被删除），其余照常组成 batch。"""
+        if self._prepare_job is not None:
+            ready: list[SpeechJob] = []
+            for job in jobs:
+                try:
+                    job.prepared = self._prepare_job(job)
+                except Exception as exc:
+                    loop.call_soon_threadsafe(job._fail, exc)
+                else:
+                    ready.append(job)
+            jobs = ready
+        if not jobs:
+            return jobs, []
+
+        streamer = _BatchAudioStreamer(loop, jobs) if any(job.chunks is not None for job in jobs) else None
+        outputs = self._run_batch(jobs, streamer, lambda: all(job.cancelled for job in jobs))
+        return jobs, outputs
@@ -0,0 +1,82 @@
+"""
+为扩散预测头（prediction_head）启用 CUDA graph。
+
+每生成一个语音 token，预测头都要前向 ddpm_inference_steps 次；输入形状固定、单次计算量小，
+kernel 启动开销占比高，适合按输入形状捕获一次、之后反复回放。
+时间步嵌入（t_embedder）内部有 CPU→GPU 拷贝，无法被捕获，仍以 eager 方式执行。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+import torch
+
+
+logger = logging.getLogger("vibevoice_docker.cuda_graphs")
+
+# 批大小随样本陆续结束而变化，每种形状一张图；超过上限的形状直接走 eager
+_MAX_GRAPHS = 16
+_WARMUP_ITERS = 3
+
+
+@dataclass
+class _CapturedGraph:
+    graph: torch.cuda.CUDAGraph
+    inputs: tuple[torch.Tensor, ...]
+    output: torch.Tensor
+
+
+def _head_body(head: torch.nn.Module, noisy_images: torch.Tensor, t_emb: torch.Tensor, condition: torch.Tensor):
+    # 与 VibeVoiceDiffusionHead.forward 一致（时间步嵌入已在外部算好）
+    x = head.noisy_images_proj(noisy_images)
+    c = head.cond_proj(condition) + t_emb
+    for layer in head.layers:
+        x = layer(x, c)
+    return head.final_layer(x, c)
+
+
+def _capture(head: torch.nn.Module, inputs: tuple[torch.Tensor, ...], pool) -> _CapturedGraph:
+    static_inputs = tuple(x.clone() for x in inputs)
+
+    # 捕获前先在旁路 stream 上预跑几次，让 cuBLAS 等完成惰性初始化
+    side_stream = torch.cuda.Stream()
+    side_stream.wait_stream(torch.cuda.current_stream())
+    with torch.cuda.stream(side_stream):
+        for _ in range(_WARMUP_ITERS):
+            _head_body(head, *static_inputs)
+    torch.cuda.current_stream().wait_stream(side_stream)
+
+    graph = torch.cuda.CUDAGraph()
+    with torch.cuda.graph(graph, pool=pool):
+        output = _head_body(head, *static_inputs)
+    return _CapturedGraph(graph=graph, inputs=static_inputs, output=output)
+
+
+def enable_prediction_head_cuda_graphs(head: torch.nn.Module) -> None:
+    graphs: dict[tuple, _CapturedGraph] = {}
+    pool = torch.cuda.graph_pool_handle()
+    eager_forward = head.forward
+
+    def forward(noisy_images: torch.Tensor, timesteps: torch.Tensor, condition: torch.Tensor) -> torch.Tensor:
+        if torch.is_grad_enabled() or not noisy_images.is_cuda:
+            return eager_forward(noisy_images, timesteps, condition)
+
+        inputs = (noisy_images, head.t_embedder(timesteps), condition)
+        key = tuple((tuple(x.shape), x.dtype) for x in inputs)
+        entry = graphs.get(key)
+        if entry is None:
+            if len(graphs) >= _MAX_GRAPHS:
+                return _head_body(head, *inputs)
+            entry = _capture(head, inputs, pool)
+            graphs[key] = entry
+            logger.info("Captured prediction head CUDA graph for shapes %s", [s for s, _ in key])
+
+        for static, real in zip(entry.inputs, inputs):
+            static.copy_(real)
+        entry.graph.replay()
+        # 下一次回放会覆盖静态输出，需拷贝一份返回
+        return entry.output.clone()
+
+    head.forward = forward
@@ -1,17 +1,21 @@
 from __future__ import annotations
 
 import gc
+import importlib.util
 import logging
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from threading import Lock
-from typing import Literal
+from typing import Any, Literal
 
 import torch
+import torch._inductor.config
+from transformers.cache_utils import QuantizedCacheConfig
 
 from vibevoice.modular.modeling_vibevoice_inference import VibeVoiceForConditionalGenerationInference
 from vibevoice.processor.vibevoice_processor import VibeVoiceProcessor
+from vibevoice_docker.cuda_graphs import enable_prediction_head_cuda_graphs
 
 
 ModelId = Literal["vibevoice-1.5b", "vibevoice-7b"]
@@ -25,14 +29,31 @@ class LoadedModel:
     device: str
     processor: VibeVoiceProcessor
     model: VibeVoiceForConditionalGenerationInference
+    generation_config: dict[str, Any]
     last_used_at: float
+    # 仅 CUDA：专用 H2D 拷贝 stream 与按输入名复用的 pinned 暂存缓冲区（只增不减）
+    h2d_stream: torch.cuda.Stream | None = None
+    staging: dict[str, torch.Tensor] = field(default_factory=dict)
 
 
 class ModelManager:
-    def __init__(self, models_dir: Path, idle_unload_seconds: int, max_loaded_models: int = 1):
+    def __init__(
+        self,
+        models_dir: Path,
+        idle_unload_seconds: int,
+        max_loaded_models: int = 1,
+        enable_cuda_graphs: bool = False,
+        enable_torch_compile: bool = False,
+        kv_cache_int8: bool = False,
+        ddpm_steps: int = 10,
+    ):
         self._models_dir = models_dir
         self._idle_unload_seconds = idle_unload_seconds
         self._max_loaded_models = max(1, int(max_loaded_models))
+        self._enable_cuda_graphs = enable_cuda_graphs
+        self._enable_torch_compile = enable_torch_compile
+        self._kv_cache_int8 = kv_cache_int8
+        self._ddpm_steps = max(1, int(ddpm_steps))
         self._lock = Lock()
         self._loaded: dict[ModelId, LoadedModel] = {}
 
@@ -46,6 +67,60 @@ class ModelManager:
     def _pick_device(self) -> str:
         return "cuda" if torch.cuda.is_available() else "cpu"
 
+    def _pick_attn_implementation(self, device: str) -> str:
+        # flash-attn 仅在 GPU 且已安装时使用，否则使用 sdpa
+        if device == "cuda" and importlib.util.find_spec("flash_attn") is not None:
+            return "flash_attention_2"
+        return "sdpa"
+
+    def _load_model(self, model_path: Path, device: str, dtype: torch.dtype) -> VibeVoiceForConditionalGenerationInference:
+        attn_implementation = self._pick_attn_implementation(device)
+        try:
+            return VibeVoiceForConditionalGenerationInference.from_pretrained(
+                str(model_path),
+                torch_dtype=dtype,
+                device_map=device,
+                attn_implementation=attn_implementation,
+            )
+        except Exception:
+            if attn_implementation == "sdpa":
+                raise
+            logger.exception("Failed to load with %s, falling back to sdpa", attn_implementation)
+            return VibeVoiceForConditionalGenerationInference.from_pretrained(
+                str(model_path),
+                torch_dtype=dtype,
+                device_map=device,
+                attn_implementation="sdpa",
+            )
+
+    def _compile_model(self, model: VibeVoiceForConditionalGenerationInference, device: str) -> None:
+        # 编译产物落盘（目录由 TORCHINDUCTOR_CACHE_DIR 决定），重启后可直接复用
+        torch._inductor.config.fx_graph_cache = True
+        # 语言模型的序列长度逐步增长，用 dynamic=True 避免每个长度都重新编译
+        model.model.language_model.compile(dynamic=True)
+        # 预测头已被 CUDA graph 接管时不再重复编译
+        if not (self._enable_cuda_graphs and device == "cuda"):
+            model.model.prediction_head.compile(mode="reduce-overhead" if device == "cuda" else "default")
+
+    def _generation_config(self, device: str, dtype: torch.dtype) -> dict[str, Any]:
+        config: dict[str, Any] = {"do_sample": False}
+        if not self._kv_cache_int8:
+            return config
+        if device != "cuda" or importlib.util.find_spec("hqq") is None:
+            logger.warning("VIBEVOICE_KV_INT8 requires CUDA and the hqq package; using the default KV cache")
+            return config
+        # transformers 内置量化 KV cache：最近 residual_length 个 token 保持原精度，其余按组量化为 int8
+        config["cache_implementation"] = "quantized"
+        config["cache_config"] = QuantizedCacheConfig(
+            backend="HQQ",
+            nbits=8,
+            axis_key=1,
+            axis_value=1,
+            compute_dtype=dtype,
+            device=device,
+        )
+        return config
+
     def get(self, model_id: ModelId) -> LoadedModel:
         with self._lock:
             loaded = self._loaded.get(model_id)
@@ -54,9 +129,12 @@ class ModelManager:
                 return loaded
 
             # 仅保留有限数量的已加载模型，避免显存/内存被占满
-            while len(self._loaded) >= self._max_loaded_models:
-                lru_id, lru_model = min(self._loaded.items(), key=lambda kv: kv[1].last_used_at)
-                self._unload_locked(lru_id, lru_model)
+            if len(self._loaded) >= self._max_loaded_models:
+                while len(self._loaded) >= self._max_loaded_models:
+                    lru_id, lru_model = min(self._loaded.items(), key=lambda kv: kv[1].last_used_at)
+                    self._unload_locked(lru_id, lru_model)
+                # 加载新模型前必须先腾出显存，这里仍在锁内回收
+                self._release_memory()
 
             model_path = self.resolve_model_path(model_id)
             if not model_path.exists():
@@ -70,14 +148,17 @@ class ModelManager:
             started_at = time.perf_counter()
             logger.info("Loading model %s from %s (device=%s dtype=%s)", model_id, model_path, device, dtype)
             processor = VibeVoiceProcessor.from_pretrained(str(model_path))
-            model = VibeVoiceForConditionalGenerationInference.from_pretrained(
-                str(model_path),
-                torch_dtype=dtype,
-                device_map=device,
-                attn_implementation="sdpa",
-            )
+            model = self._load_model(model_path, device, dtype)
             model.eval()
-            model.set_ddpm_inference_steps(num_steps=10)
+            # 扩散采样器本身即 DPM-Solver++ 2M，步数越少越快（默认 10）
+            model.set_ddpm_inference_steps(num_steps=self._ddpm_steps)
+            if self._enable_cuda_graphs and device == "cuda":
+                enable_prediction_head_cuda_graphs(model.model.prediction_head)
+                logger.info("CUDA graphs enabled for %s prediction head", model_id)
+            if self._enable_torch_compile:
+                # 编译是惰性的：首次前向（启动预热）时才真正编译
+                self._compile_model(model, device)
+                logger.info("torch.compile enabled for %s", model_id)
             logger.info("Loaded model %s in %.1fs", model_id, time.perf_counter() - started_at)
 
             loaded = LoadedModel(
@@ -86,27 +167,33 @@ class ModelManager:
                 device=device,
                 processor=processor,
                 model=model,
+                generation_config=self._generation_config(device, dtype),
                 last_used_at=time.time(),
+                h2d_stream=torch.cuda.Stream() if device == "cuda" else None,
             )
             self._loaded[model_id] = loaded
             return loaded
 
     def _unload_locked(self, model_id: ModelId, loaded: LoadedModel) -> None:
+        """第一阶段（持锁）：仅摘除引用；显存回收见 _release_memory（空闲卸载时在锁外执行）。"""
+        logger.info("Unloading model %s", model_id)
+        self._loaded.pop(model_id, None)
+        loaded.staging.clear()
         try:
-            logger.info("Unloading model %s", model_id)
-            self._loaded.pop(model_id, None)
-            try:
-                del loaded.model
-            except Exception:
-                pass
-            try:
-                del loaded.processor
-            except Exception:
-                pass
-        finally:
-            gc.collect()
-            if torch.cuda.is_available():
-                torch.cuda.empty_cache()
+            del loaded.model
+        except Exception:
+            pass
+        try:
+            del loaded.processor
+        except Exception:
+            pass
+
+    @staticmethod
+    def _release_memory() -> None:
+        # gc + empty_cache 会同步设备，可能耗时数百毫秒
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
 
     def maybe_unload_idle(self) -> list[ModelId]:
         now = time.time()
@@ -118,4 +205,7 @@ class ModelManager:
                 self._unload_locked(model_id, loaded)
                 unloaded.append(model_id)
 
+        # 锁外回收，避免阻塞并发的 get()
+        if unloaded:
+            self._release_memory()
         return unloaded
@@ -47,6 +47,12 @@ class Settings:
     preload_on_startup: bool
     warmup_on_preload: bool
     enable_cn_punct_normalize: bool
+    enable_cuda_graphs: bool
+    enable_torch_compile: bool
+    kv_cache_int8: bool
+    ddpm_steps: int
+    max_batch_size: int
+    batch_window_ms: int
     api_key: str | None
 
     @staticmethod
@@ -83,6 +89,12 @@ class Settings:
             os.environ.get("VIBEVOICE_ENABLE_CN_PUNCT_NORMALIZE"),
             True,
         )
+        enable_cuda_graphs = _env_bool(os.environ.get("VIBEVOICE_ENABLE_CUDA_GRAPHS"), False)
+        enable_torch_compile = _env_bool(os.environ.get("VIBEVOICE_TORCH_COMPILE"), False)
+        kv_cache_int8 = _env_bool(os.environ.get("VIBEVOICE_KV_INT8"), False)
+        ddpm_steps = max(1, _env_int(os.environ.get("VIBEVOICE_DDPM_STEPS"), 10))
+        max_batch_size = max(1, _env_int(os.environ.get("VIBEVOICE_MAX_BATCH_SIZE"), 1))
+        batch_window_ms = max(0, _env_int(os.environ.get("VIBEVOICE_BATCH_WINDOW_MS"), 5))
         api_key = os.environ.get("VIBEVOICE_API_KEY") or None
 
         return Settings(
@@ -97,5 +109,11 @@ class Settings:
             preload_on_startup=preload_on_startup,
             warmup_on_preload=warmup_on_preload,
             enable_cn_punct_normalize=enable_cn_punct_normalize,
+            enable_cuda_graphs=enable_cuda_graphs,
+            enable_torch_compile=enable_torch_compile,
+            kv_cache_int8=kv_cache_int8,
+            ddpm_steps=ddpm_steps,
+            max_batch_size=max_batch_size,
+            batch_window_ms=batch_window_ms,
             api_key=api_key,
         )
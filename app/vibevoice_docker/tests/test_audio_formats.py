@@ -0,0 +1,93 @@
+import io
+import unittest
+import wave
+
+import numpy as np
+
+from vibevoice_docker.audio_formats import (
+    audio_to_mp3_bytes,
+    audio_to_pcm16,
+    audio_to_wav_bytes,
+    pcm16_stream_to_mp3,
+    pcm16_to_float32,
+    pcm16_to_wav_bytes,
+    wav_stream_header,
+)
+
+
+def _looks_like_mp3(data: bytes) -> bool:
+    # ID3 标签，或 MPEG 帧同步字（11 个 1 bit）
+    return data[:3] == b"ID3" or (len(data) >= 2 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0)
+
+
+class TestPcm16(unittest.TestCase):
+    def test_clips_and_scales(self) -> None:
+        audio = np.array([[-2.0, -1.0, 0.0, 0.5, 1.0, 2.0]], dtype=np.float32)
+        pcm = audio_to_pcm16(audio)
+
+        self.assertEqual(np.dtype("<i2"), pcm.dtype)
+        self.assertEqual([-32767, -32767, 0, 16383, 32767, 32767], pcm.tolist())
+        # 不改写调用方的缓冲区
+        self.assertEqual(-2.0, audio[0, 0])
+
+    def test_pcm16_to_float32_matches_16bit_wav_reading(self) -> None:
+        pcm = np.array([-32768, -1, 0, 1, 32767], dtype="<i2")
+        np.testing.assert_array_equal(
+            np.array([-1.0, -1 / 32768, 0.0, 1 / 32768, 32767 / 32768], dtype=np.float32),
+            pcm16_to_float32(pcm),
+        )
+
+
+class TestWav(unittest.TestCase):
+    def test_wav_bytes_parse_with_stdlib(self) -> None:
+        audio = np.linspace(-1.0, 1.0, 2400, dtype=np.float32)
+        data = audio_to_wav_bytes(audio, sample_rate=24000)
+
+        with wave.open(io.BytesIO(data)) as wav:
+            self.assertEqual(24000, wav.getframerate())
+            self.assertEqual(1, wav.getnchannels())
+            self.assertEqual(2, wav.getsampwidth())
+            self.assertEqual(2400, wav.getnframes())
+            frames = wav.readframes(wav.getnframes())
+        self.assertEqual(audio_to_pcm16(audio).tobytes(), frames)
+
+    def test_pcm16_round_trip(self) -> None:
+        pcm = np.array([-32768, -1, 0, 1, 12345, 32767], dtype="<i2")
+
+        with wave.open(io.BytesIO(pcm16_to_wav_bytes(pcm, 16000))) as wav:
+            self.assertEqual(16000, wav.getframerate())
+            self.assertEqual(len(pcm), wav.getnframes())
+            frames = wav.readframes(wav.getnframes())
+        np.testing.assert_array_equal(pcm, np.frombuffer(frames, dtype="<i2"))
+
+    def test_stream_header_matches_full_header_layout(self) -> None:
+        pcm = np.zeros(10, dtype="<i2")
+        header = wav_stream_header(24000)
+        full = pcm16_to_wav_bytes(pcm, 24000)
+
+        self.assertEqual(44, len(header))
+        # 仅 RIFF/data 长度字段不同（流式写成 0xFFFFFFFF）
+        self.assertEqual(full[8:40], header[8:40])
+        self.assertEqual(b"\xff\xff\xff\xff", header[4:8])
+        self.assertEqual(b"\xff\xff\xff\xff", header[40:44])
+
+
+class TestMp3(unittest.IsolatedAsyncioTestCase):
+    def test_audio_to_mp3_bytes(self) -> None:
+        audio = np.sin(np.linspace(0, 440 * 2 * np.pi, 24000, dtype=np.float32)) * 0.5
+        data = audio_to_mp3_bytes(audio, sample_rate=24000)
+
+        self.assertTrue(data)
+        self.assertTrue(_looks_like_mp3(data))
+
+    async def test_pcm16_stream_to_mp3(self) -> None:
+        chunk = audio_to_pcm16(np.full(12000, 0.25, dtype=np.float32)).tobytes()
+
+        async def _chunks():
+            for _ in range(3):
+                yield chunk
+
+        data = b"".join([part async for part in pcm16_stream_to_mp3(_chunks(), sample_rate=24000)])
+
+        self.assertTrue(data)
+        self.assertTrue(_looks_like_mp3(data))
@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import unittest
+from pathlib import Path
+
+from vibevoice_docker.batching import SpeechBatcher
+
+
+class _FakeChunk:
+    def __init__(self, value: str):
+        self.value = value
+
+    def detach(self) -> "_FakeChunk":
+        return self
+
+    def cpu(self) -> "_FakeChunk":
+        return self
+
+
+class TestSpeechBatcher(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_jobs_share_one_batch(self) -> None:
+        calls: list[list[str]] = []
+
+        def run_batch(jobs, audio_streamer, stop_check_fn):
+            calls.append([job.script for job in jobs])
+            return [f"audio:{job.script}" for job in jobs]
+
+        batcher = SpeechBatcher(run_batch, max_batch_size=4, batch_window_seconds=0.01)
+        jobs = [await batcher.submit(f"s{i}", Path("v.wav"), 3.0) for i in range(3)]
+        batcher.start()
+
+        results = await asyncio.gather(*(job.future for job in jobs))
+        self.assertEqual(["audio:s0", "audio:s1", "audio:s2"], results)
+        self.assertEqual([["s0", "s1", "s2"]], calls)
+
+    async def test_jobs_with_different_cfg_scale_run_separately(self) -> None:
+        calls: list[tuple[float, int]] = []
+
+        def run_batch(jobs, audio_streamer, stop_check_fn):
+            calls.append((jobs[0].cfg_scale, len(jobs)))
+            return ["audio"] * len(jobs)
+
+        batcher = SpeechBatcher(run_batch, max_batch_size=4)
+        jobs = [
+            await batcher.submit("a", Path("v.wav"), 3.0),
+            await batcher.submit("b", Path("v.wav"), 1.5),
+            await batcher.submit("c", Path("v.wav"), 3.0),
+        ]
+        batcher.start()
+
+        await asyncio.gather(*(job.future for job in jobs))
+        self.assertEqual([(3.0, 2), (1.5, 1)], calls)
+
+    async def test_stream_job_receives_chunks_and_ends_early(self) -> None:
+        release = threading.Event()
+
+        def run_batch(jobs, audio_streamer, stop_check_fn):
+            audio_streamer.put([_FakeChunk("a0"), _FakeChunk("b0")], [0, 1])
+            audio_streamer.end([0])
+            # job 0 已结束，不应再收到音频块
+            audio_streamer.put([_FakeChunk("a1"), _FakeChunk("b1")], [0, 1])
+            release.wait(timeout=5)
+            audio_streamer.end()
+            return ["full-a", "full-b"]
+
+        batcher = SpeechBatcher(run_batch, max_batch_size=2, batch_window_seconds=0.01)
+        job_a = await batcher.submit("a", Path("v.wav"), 3.0, stream=True)
+        job_b = await batcher.submit("b", Path("v.wav"), 3.0, stream=True)
+        batcher.start()
+
+        chunks_a = [chunk.value async for chunk in job_a.iter_chunks()]
+        self.assertEqual(["a0"], chunks_a)
+        self.assertFalse(job_b.future.done())
+
+        release.set()
+        chunks_b = [chunk.value async for chunk in job_b.iter_chunks()]
+        self.assertEqual(["b0", "b1"], chunks_b)
+
+    async def test_errors_propagate_to_every_job(self) -> None:
+        def run_batch(jobs, audio_streamer, stop_check_fn):
+            raise RuntimeError("boom")
+
+        batcher = SpeechBatcher(run_batch, max_batch_size=2, batch_window_seconds=0.01)
+        job = await batcher.submit("a", Path("v.wav"), 3.0)
+        stream_job = await batcher.submit("b", Path("v.wav"), 3.0, stream=True)
+        batcher.start()
+
+        with self.assertRaises(RuntimeError):
+            await job.future
+        with self.assertRaises(RuntimeError):
+            async for _ in stream_job.iter_chunks():
+                pass
+
+    async def test_missing_audio_is_an_error(self) -> None:
+        batcher = SpeechBatcher(lambda jobs, streamer, stop: [None], max_batch_size=1)
+        job = await batcher.submit("a", Path("v.wav"), 3.0)
+        batcher.start()
+
+        with self.assertRaisesRegex(RuntimeError, "No audio generated"):
+            await job.future
+
+    async def test_cancelled_jobs_are_skipped(self) -> None:
+        calls: list[list[str]] = []
+
+        def run_batch(jobs, audio_streamer, stop_check_fn):
+            calls.append([job.script for job in jobs])
+            return ["audio"] * len(jobs)
+
+        batcher = SpeechBatcher(run_batch, max_batch_size=4)
+        cancelled = await batcher.submit("a", Path("v.wav"), 3.0)
+        kept = await batcher.submit("b", Path("v.wav"), 3.0)
+        cancelled.cancel()
+        batcher.start()
+
+        await kept.future
+        self.assertEqual([["b"]], calls)
+
+    async def test_prepare_failure_only_fails_that_job(self) -> None:
+        calls: list[list[tuple[str, str]]] = []
+
+        def prepare_job(job):
+            if job.voice_sample_path.name == "deleted.wav":
+                raise FileNotFoundError(job.voice_sample_path)
+            return f"wav:{job.voice_sample_path.name}"
+
+        def run_batch(jobs, audio_streamer, stop_check_fn):
+            calls.append([(job.script, job.prepared) for job in jobs])
+            return [f"audio:{job.script}" for job in jobs]
+
+        batcher = SpeechBatcher(run_batch, prepare_job=prepare_job, max_batch_size=4, batch_window_seconds=0.01)
+        ok = await batcher.submit("a", Path("v.wav"), 3.0)
+        missing = await batcher.submit("b", Path("deleted.wav"), 3.0)
+        missing_stream = await batcher.submit("c", Path("deleted.wav"), 3.0, stream=True)
+        batcher.start()
+
+        self.assertEqual("audio:a", await ok.future)
+        with self.assertRaises(FileNotFoundError):
+            await missing.future
+        with self.assertRaises(FileNotFoundError):
+            async for _ in missing_stream.iter_chunks():
+                pass
+        self.assertEqual([[("a", "wav:v.wav")]], calls)
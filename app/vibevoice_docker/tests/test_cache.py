@@ -0,0 +1,28 @@
+import unittest
+
+from vibevoice_docker.cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self) -> None:
+        cache: LRUCache[str, int] = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(1, cache.get("a"))
+
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(1, cache.get("a"))
+        self.assertEqual(3, cache.get("c"))
+        self.assertEqual(2, len(cache))
+
+    def test_discard_where(self) -> None:
+        cache: LRUCache[tuple[str, int], str] = LRUCache(max_entries=8)
+        cache.put(("x", 1), "x1")
+        cache.put(("x", 2), "x2")
+        cache.put(("y", 1), "y1")
+
+        removed = cache.discard_where(lambda key: key[0] == "x")
+        self.assertEqual(2, removed)
+        self.assertIsNone(cache.get(("x", 1)))
+        self.assertEqual("y1", cache.get(("y", 1)))
@@ -0,0 +1,19 @@
+import unittest
+
+from vibevoice_docker.text_normalize import looks_like_speaker_script, normalize_cn_punctuation_to_en_comma_period
+
+
+class TestNormalizeCnPunctuation(unittest.TestCase):
+    def test_maps_and_deletes_punctuation(self) -> None:
+        text = "你好，世界！（测试）《书名》：结束。。\n下一行"
+        self.assertEqual("你好,世界.测试书名,结束.下一行", normalize_cn_punctuation_to_en_comma_period(text))
+
+    def test_collapses_spaces_around_punctuation(self) -> None:
+        self.assertEqual("a,b.c", normalize_cn_punctuation_to_en_comma_period("a ， ， b 。 ! c"))
+
+
+class TestLooksLikeSpeakerScript(unittest.TestCase):
+    def test_first_non_empty_line_decides(self) -> None:
+        self.assertTrue(looks_like_speaker_script("\n  \n speaker 1 : hi"))
+        self.assertFalse(looks_like_speaker_script("hello\nSpeaker 0: hi"))
+        self.assertFalse(looks_like_speaker_script("Speaker\n0: hi"))
@@ -1,18 +1,20 @@
 import os
 import unittest
 
-from vibevoice_docker.text_normalize import normalize_single_speaker_script
+from vibevoice_docker.text_normalize import _get_script_line_max_chars, normalize_single_speaker_script
 
 
 class TestNormalizeSingleSpeakerScriptSplit(unittest.TestCase):
     def setUp(self) -> None:
         self._old_limit = os.environ.get("VIBEVOICE_SCRIPT_LINE_MAX_CHARS")
+        _get_script_line_max_chars.cache_clear()
 
     def tearDown(self) -> None:
         if self._old_limit is None:
             os.environ.pop("VIBEVOICE_SCRIPT_LINE_MAX_CHARS", None)
         else:
             os.environ["VIBEVOICE_SCRIPT_LINE_MAX_CHARS"] = self._old_limit
+        _get_script_line_max_chars.cache_clear()
 
     def test_splits_when_exceeds_max_chars(self) -> None:
         os.environ["VIBEVOICE_SCRIPT_LINE_MAX_CHARS"] = "20"
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from vibevoice_docker.voices import VoiceStore
+
+
+class TestVoiceStore(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.builtin_dir = root / "builtin"
+        self.builtin_dir.mkdir()
+        (self.builtin_dir / "alice.wav").write_bytes(b"RIFF")
+        self.store = VoiceStore(builtin_dir=self.builtin_dir, custom_dir=root / "custom")
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_get_voice_finds_builtin_and_custom(self) -> None:
+        voice = self.store.create_voice("Bob", sample_wav_bytes=b"RIFF")
+
+        self.assertEqual(voice, self.store.get_voice(voice.id))
+        self.assertEqual("builtin", self.store.get_voice("alice").type)
+        self.assertIsNone(self.store.get_voice("missing"))
+        self.assertIsNone(self.store.get_voice("../builtin"))
+
+    def test_list_voices_reflects_create_and_delete(self) -> None:
+        self.assertEqual(["alice"], [v.id for v in self.store.list_voices()])
+
+        voice = self.store.create_voice("Bob", sample_wav_bytes=b"RIFF")
+        self.assertEqual(["alice", voice.id], [v.id for v in self.store.list_voices()])
+
+        self.assertTrue(self.store.delete_voice(voice.id))
+        self.assertEqual(["alice"], [v.id for v in self.store.list_voices()])
+
+    def test_list_voices_skips_unfinished_tmp_dir(self) -> None:
+        voice = self.store.create_voice("Bob", sample_wav_bytes=b"RIFF")
+        tmp_dir = self.store._custom_dir / ".tmp-carol-12345678"
+        tmp_dir.mkdir()
+        (tmp_dir / "sample.wav").write_bytes(b"RIFF")
+        (tmp_dir / "voice.json").write_text('{"id": "carol-12345678"}', encoding="utf-8")
+
+        self.assertEqual(["alice", voice.id], [v.id for v in self.store.list_voices()])
+
+    def test_list_racing_create_does_not_cache_stale_result(self) -> None:
+        self.store.ensure_dirs()
+        custom_dir = self.store._custom_dir
+        mtime_ns = custom_dir.stat().st_mtime_ns
+        scandir_sorted = self.store._scandir_sorted
+        created = []
+
+        def _scandir_then_create(path):
+            entries = scandir_sorted(path)
+            if path == custom_dir and not created:
+                # 扫描结果已拿到之后 create 完成；再把 mtime 拨回，模拟落在同一个粗粒度 tick
+                created.append(self.store.create_voice("Bob", sample_wav_bytes=b"RIFF"))
+                os.utime(custom_dir, ns=(mtime_ns, mtime_ns))
+            return entries
+
+        self.store._scandir_sorted = _scandir_then_create
+        self.assertEqual(["alice"], [v.id for v in self.store.list_voices()])
+        self.assertEqual(["alice", created[0].id], [v.id for v in self.store.list_voices()])
@@ -2,15 +2,38 @@ from __future__ import annotations
 
 import os
 import re
+from functools import lru_cache
 
 
 _CJK_RE = re.compile(r"[\u4e00-\u9fff]")
-_SPEAKER_LINE_RE = re.compile(r"^\s*Speaker\s*(\d+)\s*:\s*(.*)$", re.IGNORECASE)
+# 直接在整段文本上匹配首个非空行的 Speaker 前缀，无需先 splitlines
+_SPEAKER_SCRIPT_RE = re.compile(r"\s*Speaker[^\S\r\n]*\d+[^\S\r\n]*:", re.IGNORECASE)
 
 _ENV_SCRIPT_LINE_MAX_CHARS = "VIBEVOICE_SCRIPT_LINE_MAX_CHARS"
 _DEFAULT_SCRIPT_LINE_MAX_CHARS = 150
 _SPLIT_BREAK_CHAR = "."
 
+# 句号类（包含中英文）
+_PERIOD_LIKE = "。！？；…．!?;"
+# 逗号类（包含中英文）
+_COMMA_LIKE = "，、：—－～:"
+# 这些符号直接删除（不转成逗号），避免产生不必要停顿
+_DELETE_LIKE = "（）()【】[]{}「」『』《》“”‘’\"'"
+# 合并逗号/句号连同其两侧空白与连续重复，一次扫描完成
+_COMMA_RUN_RE = re.compile(r"\s*,[\s,]*")
+_PERIOD_RUN_RE = re.compile(r"\s*\.[\s.]*")
+_CN_PUNCT_TABLE = str.maketrans(
+    {
+        **dict.fromkeys(_PERIOD_LIKE, "."),
+        **dict.fromkeys(_COMMA_LIKE, ","),
+        "\r": ".",
+        "\n": ".",
+        **dict.fromkeys(_DELETE_LIKE, None),
+    }
+)
+# 文本中不含任何待处理字符（含需合并的 ASCII 逗号/句号）时，归一化结果与原文相同
+_CN_PUNCT_PROBE_RE = re.compile("[" + re.escape(_PERIOD_LIKE + _COMMA_LIKE + _DELETE_LIKE + "\r\n,.") + "]")
+
 
 def contains_cjk(text: str) -> bool:
     return bool(_CJK_RE.search(text))
@@ -21,84 +44,21 @@ def normalize_cn_punctuation_to_en_comma_period(text: str) -> str:
     将中文/全角标点统一替换为英文逗号与句号（README Tips 推荐）。
     - 仅做字符级替换，不做复杂文本归一化。
     """
-    if not text:
+    if not text or not _CN_PUNCT_PROBE_RE.search(text):
         return text
 
-    # 句号类（包含中英文）
-    period_like = {
-        "。": ".",
-        "！": ".",
-        "？": ".",
-        "；": ".",
-        "…": ".",
-        "．": ".",
-        "!": ".",
-        "?": ".",
-        ";": ".",
-    }
-    # 逗号类（包含中英文）
-    comma_like = {
-        "，": ",",
-        "、": ",",
-        "：": ",",
-        "—": ",",
-        "－": ",",
-        "～": ",",
-        ":": ",",
-    }
-
-    # 这些符号直接删除（不转成逗号），避免产生不必要停顿
-    delete_like = {
-        "（",
-        "）",
-        "(",
-        ")",
-        "【",
-        "】",
-        "[",
-        "]",
-        "{",
-        "}",
-        "「",
-        "」",
-        "『",
-        "』",
-        "《",
-        "》",
-        "“",
-        "”",
-        "‘",
-        "’",
-        "\"",
-        "'",
-    }
-
-    out = []
-    for ch in text:
-        if ch in delete_like:
-            continue
-        if ch in comma_like:
-            out.append(",")
-        elif ch in period_like:
-            out.append(".")
-        elif ch in {"\r", "\n"}:
-            out.append(".")
-        else:
-            out.append(ch)
+    normalized = text.translate(_CN_PUNCT_TABLE)
 
     # 合并连续标点，避免 ",,," 或 "..." 过长
-    normalized = "".join(out)
-    normalized = re.sub(r"\s*,\s*", ",", normalized)
-    normalized = re.sub(r"\s*\.\s*", ".", normalized)
-    normalized = re.sub(r",{2,}", ",", normalized)
-    normalized = re.sub(r"\.{2,}", ".", normalized)
+    normalized = _COMMA_RUN_RE.sub(",", normalized)
+    normalized = _PERIOD_RUN_RE.sub(".", normalized)
     return normalized
 
 
 def looks_like_speaker_script(text: str) -> bool:
-    first = next((line.strip() for line in text.splitlines() if line.strip()), "")
-    return bool(_SPEAKER_LINE_RE.match(first))
+    return _SPEAKER_SCRIPT_RE.match(text) is not None
 
+@lru_cache(maxsize=1)
 def _get_script_line_max_chars() -> int:
     """
     获取单一 Speaker 脚本单行文本长度上限（按 Python 字符数 len 计）。
@@ -106,6 +66,7 @@ def _get_script_line_max_chars() -> int:
     - 默认：150
     - 通过环境变量覆盖：VIBEVOICE_SCRIPT_LINE_MAX_CHARS
     - 设置为 0 或负数：禁用自动拆分
+    - 进程内只读取一次环境变量（修改后需 _get_script_line_max_chars.cache_clear()）
     """
     raw = (os.environ.get(_ENV_SCRIPT_LINE_MAX_CHARS) or "").strip()
     if not raw:
@@ -120,33 +81,57 @@ def _split_text_by_max_chars(text: str, max_chars: int) -> list[str]:
     if max_chars <= 0 or len(text) <= max_chars:
         return [text]
 
-    remaining = text
+    # 在原字符串上用下标推进，只在产出分段时切片，避免每轮复制剩余文本
     parts: list[str] = []
     min_cut = max(1, max_chars // 2)
+    start, end = 0, len(text)
 
-    while len(remaining) > max_chars:
-        cut_at = None
-
-        period_idx = remaining.rfind(_SPLIT_BREAK_CHAR, min_cut, max_chars)
-        if period_idx >= 0:
-            cut_at = period_idx + 1
+    while end - start > max_chars:
+        period_idx = text.rfind(_SPLIT_BREAK_CHAR, start + min_cut, start + max_chars)
+        cut_at = period_idx + 1 if period_idx >= 0 else start + max_chars
 
-        if cut_at is None:
-            cut_at = max_chars
-
-        head = remaining[:cut_at].strip()
+        head = text[start:cut_at].strip()
         if head:
             parts.append(head)
-        remaining = remaining[cut_at:].strip()
 
-        if not remaining:
-            break
+        # 与对剩余文本 strip() 等价：跳过下一段开头的空白，末尾空白不计入长度
+        start = cut_at
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
 
-    if remaining:
-        parts.append(remaining)
+    if start < end:
+        parts.append(text[start:end])
     return parts
 
 
+def _parse_speaker_prefix(line: str) -> tuple[int, str] | None:
+    """
+    解析 `SpeakerN: text` / `Speaker N : text`（大小写不敏感），返回 (N, text)；不是 Speaker 行时返回 None。
+
+    逐行调用的热路径，用手写扫描代替 IGNORECASE 正则，匹配规则与正则版本一致。
+    """
+    line = line.lstrip()
+    if line[:7].casefold() != "speaker":
+        return None
+    n = len(line)
+    i = 7
+    while i < n and line[i].isspace():
+        i += 1
+    digits_start = i
+    while i < n and line[i].isdecimal():
+        i += 1
+    if i == digits_start:
+        return None
+    speaker_id = int(line[digits_start:i])
+    while i < n and line[i].isspace():
+        i += 1
+    if i >= n or line[i] != ":":
+        return None
+    return speaker_id, line[i + 1 :].strip()
+
+
 def normalize_single_speaker_script(script: str, *, enable_cn_punct_normalize: bool) -> str:
     """
     将输入脚本归一化为“单一说话人脚本”。
@@ -157,12 +142,14 @@ def normalize_single_speaker_script(script: str, *, enable_cn_punct_normalize: b
     - 对冒号后的文本部分：可选中文标点归一化（字符级替换）
     - 若遇到未带 Speaker 前缀的行：视为延续上一行的同一 Speaker
     """
-    if not script or not script.strip():
+    # 仅含空白的输入由末尾的 out_lines 检查兜底，避免额外扫描整段文本
+    if not script:
         raise ValueError("input is empty")
 
     out_lines: list[str] = []
     speaker_ids: set[int] = set()
     current_speaker_id: int | None = None
+    current_prefix = ""
     max_chars_per_line = _get_script_line_max_chars()
 
     for raw_line in script.splitlines():
@@ -170,11 +157,12 @@ def normalize_single_speaker_script(script: str, *, enable_cn_punct_normalize: b
         if not line:
             continue
 
-        match = _SPEAKER_LINE_RE.match(line)
-        if match:
-            speaker_id = int(match.group(1))
-            text = match.group(2).strip()
-            current_speaker_id = speaker_id
+        parsed = _parse_speaker_prefix(line)
+        if parsed is not None:
+            speaker_id, text = parsed
+            if speaker_id != current_speaker_id:
+                current_speaker_id = speaker_id
+                current_prefix = f"Speaker {speaker_id}: "
         else:
             if current_speaker_id is None:
                 raise ValueError(f"Invalid script line (missing Speaker prefix): {line}")
@@ -190,8 +178,7 @@ def normalize_single_speaker_script(script: str, *, enable_cn_punct_normalize: b
 
         cleaned = text.strip()
         if cleaned:
-            for part in _split_text_by_max_chars(cleaned, max_chars_per_line):
-                out_lines.append(f"Speaker {speaker_id}: {part}")
+            out_lines.extend(current_prefix + part for part in _split_text_by_max_chars(cleaned, max_chars_per_line))
 
     if not out_lines:
         raise ValueError("No valid content found in input.")
@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import json
+import os
 import re
 import shutil
+import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
@@ -10,9 +12,22 @@ from typing import Iterable, Literal
 from uuid import uuid4
 
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
 VoiceType = Literal["builtin", "custom"]
 
 
+def _read_json(path: Path) -> dict:
+    # orjson 直接解析字节，省去先解码成 str 的一步
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
 def _slugify(value: str) -> str:
     value = value.strip().lower()
     value = re.sub(r"[^a-z0-9\\-\\_]+", "-", value)
@@ -27,22 +42,60 @@ class Voice:
     type: VoiceType
     sample_path: Path
     created_at: int
+    # 预先解码好的 24kHz float32 波形（.npy），存在时推理直接加载，省去音频解码
+    feat_path: Path | None = None
 
 
 class VoiceStore:
     def __init__(self, builtin_dir: Path, custom_dir: Path):
         self._builtin_dir = builtin_dir
         self._custom_dir = custom_dir
+        # ((builtin 目录 mtime_ns, custom 目录 mtime_ns), 列表)；目录增删条目时 mtime 变化即失效
+        self._list_cache: tuple[tuple[int, int], list[Voice]] | None = None
+        # 每次增删音色 +1。粗粒度时间戳下 mkdir 与 rename 可能落在同一 tick、mtime 不变，
+        # 扫描期间 generation 变过的结果一律不写入缓存
+        self._list_generation = 0
+        self._list_lock = threading.Lock()
 
     def ensure_dirs(self) -> None:
         self._custom_dir.mkdir(parents=True, exist_ok=True)
 
+    @staticmethod
+    def _dir_mtime_ns(path: Path) -> int:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _scandir_sorted(path: Path) -> list[os.DirEntry]:
+        # DirEntry.is_dir()/is_file() 复用目录读取时拿到的类型信息，不必逐个 stat
+        try:
+            with os.scandir(path) as it:
+                return sorted(it, key=lambda e: e.name)
+        except (FileNotFoundError, NotADirectoryError):
+            return []
+
+    def _invalidate_list_cache(self) -> None:
+        with self._list_lock:
+            self._list_generation += 1
+            self._list_cache = None
+
     def list_voices(self) -> list[Voice]:
+        # 先取 generation 再 stat：之后发生的增删必然能被检测到
+        with self._list_lock:
+            generation = self._list_generation
+            cached = self._list_cache
+        key = (self._dir_mtime_ns(self._builtin_dir), self._dir_mtime_ns(self._custom_dir))
+        if cached is not None and cached[0] == key:
+            return list(cached[1])
+
         voices: list[Voice] = []
 
         # Builtin voices: *.wav in builtin_dir
-        if self._builtin_dir.exists():
-            for wav_path in sorted(self._builtin_dir.glob("*.wav")):
+        for entry in self._scandir_sorted(self._builtin_dir):
+            if entry.name.endswith(".wav") and entry.is_file():
+                wav_path = Path(entry.path)
                 voices.append(
                     Voice(
                         id=wav_path.stem,
@@ -54,58 +107,89 @@ class VoiceStore:
                 )
 
         # Custom voices: <id>/voice.json + sample.wav
-        if self._custom_dir.exists():
-            for voice_dir in sorted([p for p in self._custom_dir.iterdir() if p.is_dir()]):
-                meta_path = voice_dir / "voice.json"
-                sample_path = voice_dir / "sample.wav"
-                if not meta_path.exists() or not sample_path.exists():
-                    continue
-                try:
-                    meta = json.loads(meta_path.read_text(encoding="utf-8"))
-                except Exception:
-                    continue
-                voices.append(
-                    Voice(
-                        id=str(meta.get("id") or voice_dir.name),
-                        name=str(meta.get("name") or voice_dir.name),
-                        type="custom",
-                        sample_path=sample_path,
-                        created_at=int(meta.get("created_at") or 0),
-                    )
-                )
-
-        return voices
+        # 以 "." 开头的是 create_voice 尚未完成的临时目录
+        for entry in self._scandir_sorted(self._custom_dir):
+            if not entry.name.startswith(".") and entry.is_dir():
+                voice = self._load_custom_voice(Path(entry.path))
+                if voice is not None:
+                    voices.append(voice)
+
+        with self._list_lock:
+            if self._list_generation == generation:
+                self._list_cache = (key, voices)
+        return list(voices)
+
+    def _load_custom_voice(self, voice_dir: Path) -> Voice | None:
+        meta_path = voice_dir / "voice.json"
+        sample_path = voice_dir / "sample.wav"
+        feat_path = voice_dir / "sample.npy"
+        if not sample_path.exists():
+            return None
+        try:
+            # voice.json 不存在时读取即抛错，省去单独的 exists 检查
+            meta = _read_json(meta_path)
+        except Exception:
+            return None
+        return Voice(
+            id=str(meta.get("id") or voice_dir.name),
+            name=str(meta.get("name") or voice_dir.name),
+            type="custom",
+            sample_path=sample_path,
+            created_at=int(meta.get("created_at") or 0),
+            feat_path=feat_path if feat_path.exists() else None,
+        )
 
     def get_voice(self, voice_id: str) -> Voice | None:
+        # 快速路径：按 id 直接定位文件（与 list_voices 的顺序一致：builtin 优先）
+        if voice_id and Path(voice_id).name == voice_id and voice_id not in {".", ".."}:
+            wav_path = self._builtin_dir / f"{voice_id}.wav"
+            if wav_path.is_file():
+                return Voice(id=voice_id, name=voice_id, type="builtin", sample_path=wav_path, created_at=0)
+            voice = self._load_custom_voice(self._custom_dir / voice_id)
+            if voice is not None and voice.id == voice_id:
+                return voice
+
+        # voice.json 中的 id 可能与目录名不同，回退到完整扫描
         for v in self.list_voices():
             if v.id == voice_id:
                 return v
         return None
 
-    def create_voice(self, name: str, sample_wav_path: Path) -> Voice:
+    def create_voice(self, name: str, sample_wav_bytes: bytes, sample_feat_bytes: bytes | None = None) -> Voice:
         self.ensure_dirs()
 
         now = int(time.time())
         voice_id = f"{_slugify(name)}-{uuid4().hex[:8]}"
         voice_dir = self._custom_dir / voice_id
-        voice_dir.mkdir(parents=True, exist_ok=False)
-
-        stored_sample = voice_dir / "sample.wav"
-        shutil.copy2(sample_wav_path, stored_sample)
-
-        meta = {
-            "id": voice_id,
-            "name": name,
-            "created_at": now,
-        }
-        (voice_dir / "voice.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
-
+        # 先在隐藏的临时目录里写齐所有文件，最后一步 rename 进来，list_voices 不会读到半成品
+        tmp_dir = self._custom_dir / f".tmp-{voice_id}"
+        tmp_dir.mkdir(parents=True, exist_ok=False)
+        try:
+            (tmp_dir / "sample.wav").write_bytes(sample_wav_bytes)
+            if sample_feat_bytes is not None:
+                (tmp_dir / "sample.npy").write_bytes(sample_feat_bytes)
+            meta = {
+                "id": voice_id,
+                "name": name,
+                "created_at": now,
+            }
+            (tmp_dir / "voice.json").write_bytes(
+                json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            )
+            os.rename(tmp_dir, voice_dir)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self._invalidate_list_cache()
+        stored_feat = voice_dir / "sample.npy" if sample_feat_bytes is not None else None
         return Voice(
             id=voice_id,
             name=name,
             type="custom",
-            sample_path=stored_sample,
+            sample_path=voice_dir / "sample.wav",
             created_at=now,
+            feat_path=stored_feat,
         )
 
     def delete_voice(self, voice_id: str) -> bool:
@@ -113,5 +197,6 @@ class VoiceStore:
         if not voice_dir.exists():
             return False
         shutil.rmtree(voice_dir)
+        self._invalidate_list_cache()
         return True
 
@@ -11,14 +11,18 @@
 - VIBEVOICE_MODELSCOPE_REVISION: ModelScope revision（可选；默认用仓库默认 revision）
 - MODELSCOPE_CACHE: ModelScope 下载缓存目录（建议指向临时目录，如 /tmp/modelscope-cache）
 - VIBEVOICE_EXPECTED_INDEX_SHA256: 校验 model.safetensors.index.json 的 sha256（可选；为空则使用脚本内置值）
+- VIBEVOICE_EXPECTED_SHARD_SHA256: 额外校验权重分片的 sha256（可选；格式 `文件名=sha256`，多个用逗号分隔；并行计算）
+- VIBEVOICE_DL_WORKERS: 并发下载数（可选；默认 min(32, CPU 核数 * 4)，下载为 I/O 密集型）
 - VIBEVOICE_CLEAN_MODELSCOPE_CACHE: 是否清理 MODELSCOPE_CACHE（默认 1；设为 0/false/no 可保留）
 """
 
+import hashlib
+import json
 import os
 import shutil
-from hashlib import sha256
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from modelscope.hub.snapshot_download import snapshot_download
 
@@ -56,11 +60,75 @@ def _expected_index_sha256(model_id: str) -> Optional[str]:
 
 
 def _sha256_file(path: Path) -> str:
-    h = sha256()
     with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+        # Python 3.11+：hashlib.file_digest 直接在文件描述符上分块计算
+        if hasattr(hashlib, "file_digest"):
+            return hashlib.file_digest(f, "sha256").hexdigest()
+
+        # 旧版本：复用同一块缓冲区读取，避免每次分配新的 bytes
+        h = hashlib.sha256()
+        buf = bytearray(8 * 1024 * 1024)
+        view = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+        return h.hexdigest()
+
+
+# 推理用不到的说明文档/图片，不下载
+_IGNORE_PATTERNS = ["*.md", "*.png", "*.jpg", "*.jpeg", "*.gif"]
+
+
+def _download_workers() -> int:
+    raw = (os.getenv("VIBEVOICE_DL_WORKERS") or "").strip()
+    if raw:
+        return max(1, int(raw))
+    return min(32, (os.cpu_count() or 4) * 4)
+
+
+def _parse_expected_shard_sha256(value: Optional[str]) -> Dict[str, str]:
+    expected: Dict[str, str] = {}
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, digest = item.partition("=")
+        if not sep or not name.strip() or not digest.strip():
+            raise ValueError(f"Invalid VIBEVOICE_EXPECTED_SHARD_SHA256 entry: {item!r}")
+        expected[name.strip()] = digest.strip().lower()
+    return expected
+
+
+def _verify_shards(local_dir: Path, expected: Dict[str, str]) -> None:
+    paths = [local_dir / name for name in expected]
+    missing = [str(p) for p in paths if not p.exists()]
+    if missing:
+        raise FileNotFoundError(f"Missing model shard(s): {', '.join(missing)}")
+
+    # hashlib 在计算大块数据时会释放 GIL，多线程可并行读取/校验多个分片
+    with ThreadPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as ex:
+        actual = dict(zip(expected, ex.map(_sha256_file, paths)))
+
+    mismatched = [f"{name}: expected={expected[name]} actual={actual[name]}" for name in expected if actual[name] != expected[name]]
+    if mismatched:
+        raise ValueError("Model shard sha256 mismatch. " + "; ".join(mismatched))
+
+
+def _local_snapshot_complete(local_dir: Path, expected_index_sha256: Optional[str]) -> bool:
+    """本地已有与期望 sha256 一致的索引，且索引引用的分片都在时，视为已下载完成。"""
+    if not expected_index_sha256:
+        return False
+    index_path = local_dir / "model.safetensors.index.json"
+    if not index_path.exists() or _sha256_file(index_path).lower() != expected_index_sha256.lower():
+        return False
+    try:
+        weight_map = json.loads(index_path.read_text(encoding="utf-8")).get("weight_map") or {}
+    except ValueError:
+        return False
+    # 索引存在但分片缺失（例如上次下载中断）时仍需重新下载
+    return bool(weight_map) and all((local_dir / name).exists() for name in set(weight_map.values()))
 
 
 def main() -> None:
@@ -73,15 +141,19 @@ def main() -> None:
 
     local_dir = models_dir / modelscope_repo_id.split("/", 1)[-1]
     local_dir.mkdir(parents=True, exist_ok=True)
-    snapshot_download(
-        model_id=modelscope_repo_id,
-        revision=revision,
-        cache_dir=cache_dir,
-        local_dir=str(local_dir),
-        max_workers=8,
-    )
 
     expected = (os.getenv("VIBEVOICE_EXPECTED_INDEX_SHA256") or "").strip() or _expected_index_sha256(model_id)
+    # 已有完整快照（如复用的构建缓存）时跳过下载
+    if not _local_snapshot_complete(local_dir, expected):
+        snapshot_download(
+            model_id=modelscope_repo_id,
+            revision=revision,
+            cache_dir=cache_dir,
+            local_dir=str(local_dir),
+            ignore_patterns=_IGNORE_PATTERNS,
+            max_workers=_download_workers(),
+        )
+
     if expected:
         index_path = local_dir / "model.safetensors.index.json"
         if not index_path.exists():
@@ -94,6 +166,10 @@ def main() -> None:
                 f"expected={expected.lower()} actual={actual.lower()} path={index_path}"
             )
 
+    expected_shards = _parse_expected_shard_sha256(os.getenv("VIBEVOICE_EXPECTED_SHARD_SHA256"))
+    if expected_shards:
+        _verify_shards(local_dir, expected_shards)
+
     # 可选清理：避免把临时 cache 目录打进镜像层（有助于稳定 layer digest）
     clean_cache = (os.getenv("VIBEVOICE_CLEAN_MODELSCOPE_CACHE") or "1").strip().lower() not in {"0", "false", "no"}
     if clean_cache and cache_dir: